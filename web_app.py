@@ -4,132 +4,333 @@ AWS CLF-C02 Quiz Trainer - Web Interface
 Flask-based web application for practicing AWS certification questions
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, current_app, render_template, request, jsonify, session
+from flask.json.provider import JSONProvider
+from flask_session import Session
+from cachelib.file import FileSystemCache
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import timedelta
+import atexit
+import functools
+import orjson
+import queue
 import sqlite3
 import os
 import random
+import threading
+import time
+import uuid
 
 
 def shuffle_options(options):
-    """Shuffle options and reassign letters A, B, C, D, etc."""
-    # Shuffle the options
-    shuffled = options.copy()
-    random.shuffle(shuffled)
+    """Shuffle options in place and reassign letters A, B, C, D, etc."""
+    random.shuffle(options)
 
     # Reassign letters and track correct answers
     letters = 'ABCDEFGHIJ'
-    new_options = []
     correct = []
 
-    for i, opt in enumerate(shuffled):
-        new_letter = letters[i]
-        new_options.append({
-            'letter': new_letter,
-            'text': opt['text'],
-            'is_correct': opt['is_correct']
-        })
+    for i, opt in enumerate(options):
+        opt['letter'] = letters[i]
         if opt['is_correct']:
-            correct.append(new_letter)
+            correct.append(letters[i])
+
+    return options, correct
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson (C implementation)"""
+
+    sort_keys = False
+    mimetype = 'application/json'
+
+    def _option(self, sort_keys=None):
+        if sort_keys is None:
+            sort_keys = self.sort_keys
+        return orjson.OPT_SORT_KEYS if sort_keys else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self._option(kwargs.get('sort_keys'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize args or kwargs like jsonify(), passing orjson's bytes
+        straight to the response without a str round trip"""
+        if args and kwargs:
+            raise TypeError("response() takes either args or kwargs, not both")
+
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs or None
+
+        return current_app.response_class(orjson.dumps(obj, option=self._option()),
+                                          mimetype=self.mimetype)
 
-    return new_options, correct
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = 'aws-quiz-trainer-secret-key-2024'
 
+# Keep session data on the server, the cookie only carries the session id.
+# Sessions expire after SESSION_LIFETIME; expired files are removed first
+# once the store passes SESSION_STORE_THRESHOLD, and only if it's still over
+# the limit are the oldest live sessions evicted.
+SESSION_LIFETIME = timedelta(hours=12)
+SESSION_STORE_THRESHOLD = 10000
+
+app.config['PERMANENT_SESSION_LIFETIME'] = SESSION_LIFETIME
+app.config['SESSION_TYPE'] = 'cachelib'
+app.config['SESSION_CACHELIB'] = FileSystemCache(
+    os.path.join(os.path.dirname(__file__), 'flask_session'),
+    threshold=SESSION_STORE_THRESHOLD)
+Session(app)
+
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "aws_quiz.db")
 
 
-def get_db_connection():
-    """Create database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
+# Long-lived connections are kept in a small pool so repeated requests reuse
+# SQLite's page cache instead of reopening the database file every time.
+DB_POOL_SIZE = 8
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() returns it to the pool"""
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        try:
+            _db_pool.put_nowait(self)
+        except queue.Full:
+            super().close()
+
+    def dispose(self):
+        """Really close the underlying connection"""
+        super().close()
+
+
+# Applied once when a connection is opened: fewer fsyncs per commit (safe
+# with WAL, see _enable_wal), a busy timeout and larger in-memory caches
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA wal_autocheckpoint=1000",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+WAL_SWITCH_ATTEMPTS = 50
+
+
+def _enable_wal(conn):
+    """Switch the database to WAL so readers don't block the writer
+
+    The switch needs an exclusive lock and doesn't wait on the busy timeout,
+    so retry while another process (e.g. a worker starting at the same time)
+    holds the database. Once the database is in WAL mode this is a no-op.
+    """
+    for attempt in range(WAL_SWITCH_ATTEMPTS):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) or attempt == WAL_SWITCH_ATTEMPTS - 1:
+                raise
+            time.sleep(0.1)
+
+
+def _open_db_connection():
+    """Open a new pooled connection and apply per-connection PRAGMAs"""
+    conn = sqlite3.connect(DATABASE_PATH, factory=PooledConnection,
+                           check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    _enable_wal(conn)
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+# Hot-path statements are kept as constants so every call passes the exact
+# same SQL text and hits the connection's prepared statement cache.
+_SAVE_PROGRESS_SQL = '''
+    INSERT INTO user_progress (question_id, answered_correctly, quiz_id)
+    VALUES (?, ?, ?)
+'''
+
+_INSERT_UPSERT_SQL = '''
+    INSERT INTO question_mastery (question_id, correct_count, incorrect_count, last_answered)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(question_id) DO UPDATE SET
+        correct_count = correct_count + excluded.correct_count,
+        incorrect_count = incorrect_count + excluded.incorrect_count,
+        last_answered = CURRENT_TIMESTAMP
+    RETURNING correct_count, incorrect_count
+'''
+
+
+def get_db_connection():
+    """Get a database connection from the pool (call close() to return it)"""
+    try:
+        return _db_pool.get_nowait()
+    except queue.Empty:
+        return _open_db_connection()
+
+
+@atexit.register
+def close_db_connections():
+    """Close all pooled connections"""
+    while True:
+        try:
+            _db_pool.get_nowait().dispose()
+        except queue.Empty:
+            break
+
+
 def init_mastery_table():
     """Create mastery tracking table if it doesn't exist"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Create mastery table to track correct answer counts
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS question_mastery (
-            question_id INTEGER PRIMARY KEY,
-            correct_count INTEGER DEFAULT 0,
-            incorrect_count INTEGER DEFAULT 0,
-            last_answered TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (question_id) REFERENCES questions(id)
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
+    # Run the whole schema setup under one write lock so workers starting at
+    # the same time see each other's changes (e.g. the quiz_id column check)
+    try:
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # Create mastery table to track correct answer counts
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS question_mastery (
+                    question_id INTEGER PRIMARY KEY,
+                    correct_count INTEGER DEFAULT 0,
+                    incorrect_count INTEGER DEFAULT 0,
+                    last_answered TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (question_id) REFERENCES questions(id)
+                )
+            ''')
+
+            # Tag answer history with the quiz session it belongs to
+            cursor.execute("PRAGMA table_info(user_progress)")
+            if 'quiz_id' not in [row['name'] for row in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE user_progress ADD COLUMN quiz_id TEXT")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_progress_quiz ON user_progress(quiz_id)")
+
+            # Indexes for the question/options join (run once at startup), the
+            # mastery filter and the per-domain question counts. idx_options_qid
+            # supersedes the old single-column idx_options_question.
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_options_qid ON options(question_id, option_letter)")
+            cursor.execute("DROP INDEX IF EXISTS idx_options_question")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_mastery_correct ON question_mastery(correct_count)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_q_domain ON questions(domain)")
+
+            # Gather planner statistics once
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                cursor.execute("ANALYZE")
+    finally:
+        conn.close()
 
 
 # Initialize mastery table on startup
 init_mastery_table()
 
 
-def get_questions(domain=None, limit=None):
-    """Fetch questions from database"""
+def _build_questions(rows):
+    """Group joined question/option rows into question dicts"""
+    questions = []
+    current_qid = None
+    question = None
+
+    for row in rows:
+        if row['id'] != current_qid:
+            current_qid = row['id']
+            question = {
+                'id': row['id'],
+                'question': row['question_text'],
+                'domain': row['domain'],
+                'explanation': row['explanation'] or '',
+                'options': [],
+                'correct': []
+            }
+            questions.append(question)
+
+        if row['option_letter'] is None:
+            continue
+
+        # Keep original option order (no shuffling)
+        question['options'].append({
+            'letter': row['option_letter'],
+            'text': row['option_text'],
+            'is_correct': row['is_correct']
+        })
+        if row['is_correct']:
+            question['correct'].append(row['option_letter'])
+
+    return questions
+
+
+def _load_questions():
+    """Load all questions with their options (questions are static)"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    cursor.execute('''
+        SELECT q.id, q.question_text, q.domain, q.explanation,
+               o.option_letter, o.option_text, o.is_correct
+        FROM questions q
+        LEFT JOIN options o ON o.question_id = q.id
+        ORDER BY q.id, o.option_letter
+    ''')
+
+    questions = _build_questions(cursor.fetchall())
+
+    conn.close()
+    return questions
+
+
+# Questions and options are read-only reference data (populated by
+# import_github_questions.py), so they are loaded once and served from memory.
+# Restart the app after re-importing questions.
+QUESTIONS = {q['id']: q for q in _load_questions()}
+QUESTIONS_BY_DOMAIN = {}
+for _question in QUESTIONS.values():
+    QUESTIONS_BY_DOMAIN.setdefault(_question['domain'], []).append(_question['id'])
+
+
+def get_questions(domain=None, limit=None):
+    """Get questions in random order, optionally filtered by domain"""
     if domain and domain != 'all':
-        cursor.execute('''
-            SELECT id, question_text, domain, explanation
-            FROM questions
-            WHERE domain = ?
-            ORDER BY RANDOM()
-        ''', (domain,))
+        ids = QUESTIONS_BY_DOMAIN.get(domain, [])
     else:
-        cursor.execute('''
-            SELECT id, question_text, domain, explanation
-            FROM questions
-            ORDER BY RANDOM()
-        ''')
+        ids = list(QUESTIONS)
 
-    rows = cursor.fetchall()
+    # Sample ids instead of shuffling the whole set when a limit is given
+    count = limit if limit and 0 < limit < len(ids) else len(ids)
+    return [QUESTIONS[qid] for qid in random.sample(ids, count)]
 
-    if limit:
-        rows = rows[:limit]
 
-    questions = []
-    for row in rows:
-        # Get options for this question
-        cursor.execute('''
-            SELECT option_letter, option_text, is_correct
-            FROM options
-            WHERE question_id = ?
-            ORDER BY option_letter
-        ''', (row['id'],))
-
-        options = []
-        for opt in cursor.fetchall():
-            options.append({
-                'letter': opt['option_letter'],
-                'text': opt['option_text'],
-                'is_correct': opt['is_correct']
-            })
-
-        # Get correct answer letters (no shuffling - keep original order)
-        correct = [opt['letter'] for opt in options if opt['is_correct']]
-
-        questions.append({
-            'id': row['id'],
-            'question': row['question_text'],
-            'domain': row['domain'],
-            'explanation': row['explanation'] or '',
-            'options': options,
-            'correct': correct
-        })
+def _get_question_by_id(qid):
+    """Get a single question by id (None if it doesn't exist)"""
+    return QUESTIONS.get(qid)
 
-    conn.close()
-    return questions
+
+# Stats are cached for a short time; the cache is also dropped whenever
+# progress is written or cleared in this process.
+STATS_CACHE_SECONDS = 2
 
 
 def get_stats():
     """Get database statistics"""
+    return _get_stats_cached(int(time.time() // STATS_CACHE_SECONDS))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_stats_cached(bucket):
+    """Compute database statistics (bucket is the cache time slot)"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -144,20 +345,22 @@ def get_stats():
     ''')
     domains = [{'name': row['domain'], 'count': row['count']} for row in cursor.fetchall()]
 
-    # Get questions that need practice (answered but not mastered - less than 4 correct)
+    # Mastery breakdown in a single pass over question_mastery:
+    # mastered (4+ correct), needs practice (answered but less than 4 correct)
+    # and wrong (answered incorrectly at least once, not yet mastered)
     cursor.execute('''
-        SELECT COUNT(*) as count FROM question_mastery
-        WHERE correct_count < 4 AND (correct_count > 0 OR incorrect_count > 0)
+        SELECT
+            COALESCE(SUM(CASE WHEN correct_count >= 4 THEN 1 ELSE 0 END), 0) as mastered,
+            COALESCE(SUM(CASE WHEN correct_count < 4 AND (correct_count > 0 OR incorrect_count > 0)
+                              THEN 1 ELSE 0 END), 0) as needs_practice,
+            COALESCE(SUM(CASE WHEN incorrect_count > 0 AND correct_count < 4
+                              THEN 1 ELSE 0 END), 0) as wrong
+        FROM question_mastery
     ''')
-    needs_practice = cursor.fetchone()['count']
-
-    # Get mastered questions count (4+ correct answers)
-    cursor.execute("SELECT COUNT(*) as count FROM question_mastery WHERE correct_count >= 4")
-    mastered_count = cursor.fetchone()['count']
-
-    # Get questions answered incorrectly at least once
-    cursor.execute("SELECT COUNT(*) as count FROM question_mastery WHERE incorrect_count > 0 AND correct_count < 4")
-    wrong_count = cursor.fetchone()['count']
+    row = cursor.fetchone()
+    mastered_count = row['mastered']
+    needs_practice = row['needs_practice']
+    wrong_count = row['wrong']
 
     conn.close()
     return {
@@ -169,118 +372,172 @@ def get_stats():
     }
 
 
-def save_progress(question_id, is_correct):
-    """Save user progress to database with mastery tracking"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Also save to user_progress for history
-    cursor.execute('''
-        INSERT INTO user_progress (question_id, answered_correctly)
-        VALUES (?, ?)
-    ''', (question_id, is_correct))
-
-    # Update mastery table
-    cursor.execute('''
-        INSERT INTO question_mastery (question_id, correct_count, incorrect_count, last_answered)
-        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(question_id) DO UPDATE SET
-            correct_count = correct_count + ?,
-            incorrect_count = incorrect_count + ?,
-            last_answered = CURRENT_TIMESTAMP
-    ''', (question_id,
-          1 if is_correct else 0,
-          0 if is_correct else 1,
-          1 if is_correct else 0,
-          0 if is_correct else 1))
-
-    conn.commit()
-    conn.close()
+# Answers are written by a single background thread so concurrent requests
+# share one transaction (and one fsync) instead of committing individually.
+WRITE_BATCH_SIZE = 500
+WRITE_TIMEOUT_SECONDS = 10
+_write_queue = queue.Queue()
+
+
+def _write_progress_batch(batch):
+    """Write a batch of queued answers in a single transaction"""
+    conn = None
+    try:
+        conn = get_db_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        # Also save to user_progress for history (one statement for the batch)
+        conn.executemany(_SAVE_PROGRESS_SQL, [(question_id, is_correct, quiz_id)
+                                              for question_id, is_correct, quiz_id, _ in batch])
+
+        results = []
+        for question_id, is_correct, _, _ in batch:
+            # Update mastery table, getting the new counts back
+            row = conn.execute(_INSERT_UPSERT_SQL, (question_id,
+                                                    1 if is_correct else 0,
+                                                    0 if is_correct else 1)).fetchall()[0]
+            results.append({'correct': row['correct_count'], 'incorrect': row['incorrect_count']})
+        conn.commit()
+    except Exception as e:
+        for *_, future in batch:
+            future.set_exception(e)
+        if conn is not None:
+            conn.rollback()
+    else:
+        _get_stats_cached.cache_clear()
+        for (*_, future), mastery in zip(batch, results):
+            future.set_result(mastery)
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def _progress_writer():
+    """Drain the write queue, committing whatever has accumulated as one batch"""
+    while True:
+        batch = [_write_queue.get()]
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Skip answers whose request gave up waiting and cancelled them, so
+        # a resubmitted answer is never written twice
+        pending = [item for item in batch if item[-1].set_running_or_notify_cancel()]
+
+        try:
+            if pending:
+                _write_progress_batch(pending)
+        except Exception as e:
+            # Never let the only writer thread die; fail whatever is unresolved
+            app.logger.exception("Failed to write progress batch")
+            for *_, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
+
+
+threading.Thread(target=_progress_writer, name='progress-writer', daemon=True).start()
+
+
+def save_progress(question_id, is_correct, quiz_id=None):
+    """Queue user progress for saving with mastery tracking
+
+    Returns a Future that completes once the answer has been committed,
+    with the question's updated mastery info as its result.
+    """
+    future = Future()
+    _write_queue.put((question_id, is_correct, quiz_id, future))
+    return future
+
+
+@atexit.register
+def flush_progress():
+    """Wait until all queued answers have been written"""
+    _write_queue.join()
 
 
-def get_mastery_info(question_id):
-    """Get mastery info for a specific question"""
+def get_missed_questions():
+    """Get questions that need more practice (less than 4 correct answers)"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # Get questions with less than 4 correct answers (not mastered yet)
     cursor.execute('''
-        SELECT correct_count, incorrect_count
+        SELECT question_id, correct_count, incorrect_count
         FROM question_mastery
-        WHERE question_id = ?
-    ''', (question_id,))
+        WHERE correct_count < 4
+        ORDER BY incorrect_count DESC, correct_count ASC, RANDOM()
+    ''')
 
-    row = cursor.fetchone()
-    conn.close()
+    questions = []
+    for row in cursor.fetchall():
+        if row['question_id'] not in QUESTIONS:
+            continue
 
-    if row:
-        return {'correct': row['correct_count'], 'incorrect': row['incorrect_count']}
-    return {'correct': 0, 'incorrect': 0}
+        questions.append(dict(QUESTIONS[row['question_id']], mastery={
+            'correct': row['correct_count'],
+            'incorrect': row['incorrect_count']
+        }))
 
+    conn.close()
+    return questions
 
-def get_missed_questions():
-    """Get questions that need more practice (less than 4 correct answers)"""
+
+def get_domain_scores(quiz_id):
+    """Get per-domain correct/total counts for the answers of one quiz"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Get questions with less than 4 correct answers (not mastered yet)
     cursor.execute('''
-        SELECT q.id, q.question_text, q.domain, q.explanation,
-               COALESCE(m.correct_count, 0) as correct_count,
-               COALESCE(m.incorrect_count, 0) as incorrect_count
-        FROM questions q
-        INNER JOIN question_mastery m ON q.id = m.question_id
-        WHERE m.correct_count < 4
-        ORDER BY m.incorrect_count DESC, m.correct_count ASC, RANDOM()
-    ''')
+        SELECT q.domain, SUM(p.answered_correctly) as correct, COUNT(*) as total
+        FROM user_progress p
+        INNER JOIN questions q ON q.id = p.question_id
+        WHERE p.quiz_id = ?
+        GROUP BY q.domain
+        ORDER BY MIN(p.id)
+    ''', (quiz_id,))
 
-    rows = cursor.fetchall()
-
-    questions = []
-    for row in rows:
-        # Get options for this question
-        cursor.execute('''
-            SELECT option_letter, option_text, is_correct
-            FROM options
-            WHERE question_id = ?
-            ORDER BY option_letter
-        ''', (row['id'],))
-
-        options = []
-        for opt in cursor.fetchall():
-            options.append({
-                'letter': opt['option_letter'],
-                'text': opt['option_text'],
-                'is_correct': opt['is_correct']
-            })
-
-        # Get correct answer letters (no shuffling - keep original order)
-        correct = [opt['letter'] for opt in options if opt['is_correct']]
-
-        questions.append({
-            'id': row['id'],
-            'question': row['question_text'],
-            'domain': row['domain'],
-            'explanation': row['explanation'] or '',
-            'options': options,
-            'correct': correct,
-            'mastery': {
-                'correct': row['correct_count'],
-                'incorrect': row['incorrect_count']
-            }
-        })
+    domain_scores = {row['domain']: {'correct': row['correct'], 'total': row['total']}
+                     for row in cursor.fetchall()}
 
     conn.close()
-    return questions
+    return domain_scores
+
+
+def _domain_scores_from_answers(answers):
+    """Get per-domain correct/total counts from a quiz's session answers"""
+    domain_scores = {}
+    for answer in answers:
+        question = _get_question_by_id(answer['question_id'])
+        if question is None:
+            continue
+        scores = domain_scores.setdefault(question['domain'], {'correct': 0, 'total': 0})
+        scores['total'] += 1
+        if answer['is_correct']:
+            scores['correct'] += 1
+
+    return domain_scores
 
 
 def clear_progress():
     """Clear all user progress"""
+    # Don't let answers still in the queue land after the reset
+    flush_progress()
+
+    # Clear both tables in a single transaction
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM user_progress")
-    cursor.execute("DELETE FROM question_mastery")
-    conn.commit()
-    conn.close()
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM user_progress")
+            conn.execute("DELETE FROM question_mastery")
+    finally:
+        conn.close()
+
+    _get_stats_cached.cache_clear()
 
 
 @app.route('/')
@@ -301,8 +558,9 @@ def quiz():
     if not questions:
         return render_template('error.html', message="No questions available")
 
-    # Store questions in session
-    session['questions'] = questions
+    # Store only question ids in session, questions are re-fetched by id
+    session['qids'] = [q['id'] for q in questions]
+    session['quiz_id'] = uuid.uuid4().hex
     session['current_index'] = 0
     session['score'] = 0
     session['answers'] = []
@@ -321,23 +579,47 @@ def answer():
     data = request.get_json()
     selected = data.get('selected', [])
 
-    questions = session.get('questions', [])
-    current_index = session.get('current_index', 0)
+    # Read the session once and write back only the keys that change
+    sess = dict(session)
+    qids = sess.get('qids', [])
+    current_index = sess.get('current_index', 0)
 
-    if current_index >= len(questions):
+    if current_index >= len(qids):
         return jsonify({'error': 'Quiz completed'})
 
-    question = questions[current_index]
+    question = _get_question_by_id(qids[current_index])
+    if question is None:
+        # Session outlived the question (e.g. questions were re-imported)
+        return jsonify({'error': 'This question is no longer available, please start a new quiz'})
+
     correct = set(question['correct'])
     selected_set = set(selected)
 
     is_correct = correct == selected_set
 
+    # Save progress to database and get the updated mastery info
+    future = save_progress(question['id'], is_correct, sess.get('quiz_id'))
+    try:
+        mastery = future.result(timeout=WRITE_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        app.logger.warning("Timed out saving answer for question %s", question['id'])
+        # Only offer a retry if the answer was cancelled before the writer
+        # picked it up; otherwise it is (or will be) written already
+        if future.cancel():
+            return jsonify({'error': 'Could not save your answer, please try again',
+                            'retry': True})
+        return jsonify({'error': 'Your answer is taking too long to save, '
+                                 'please continue with the next question'})
+    except Exception:
+        app.logger.exception("Failed to save answer for question %s", question['id'])
+        return jsonify({'error': 'Could not save your answer, please try again',
+                        'retry': True})
+
     if is_correct:
-        session['score'] = session.get('score', 0) + 1
+        session['score'] = sess.get('score', 0) + 1
 
     # Record answer
-    answers = session.get('answers', [])
+    answers = sess.get('answers', [])
     answers.append({
         'question_id': question['id'],
         'selected': selected,
@@ -346,12 +628,6 @@ def answer():
     })
     session['answers'] = answers
 
-    # Save progress to database
-    save_progress(question['id'], is_correct)
-
-    # Get updated mastery info
-    mastery = get_mastery_info(question['id'])
-
     return jsonify({
         'is_correct': is_correct,
         'correct_answers': list(correct),
@@ -363,44 +639,43 @@ def answer():
 @app.route('/next')
 def next_question():
     """Get next question"""
-    questions = session.get('questions', [])
+    qids = session.get('qids', [])
     current_index = session.get('current_index', 0) + 1
     session['current_index'] = current_index
 
-    if current_index >= len(questions):
+    if current_index >= len(qids):
         return jsonify({'completed': True})
 
-    question = questions[current_index]
+    question = _get_question_by_id(qids[current_index])
+    if question is None:
+        # Session outlived the question, end the quiz here
+        return jsonify({'completed': True})
 
     return jsonify({
         'completed': False,
         'question': question,
         'current': current_index + 1,
-        'total': len(questions)
+        'total': len(qids)
     })
 
 
 @app.route('/results')
 def results():
     """Show quiz results"""
-    questions = session.get('questions', [])
+    qids = session.get('qids', [])
     answers = session.get('answers', [])
     score = session.get('score', 0)
     domain = session.get('domain', 'all')
 
-    total = len(questions)
+    total = len(qids)
     percentage = (score / total * 100) if total > 0 else 0
     passed = percentage >= 70
 
-    # Calculate domain breakdown
-    domain_scores = {}
-    for i, answer in enumerate(answers):
-        q_domain = questions[i]['domain']
-        if q_domain not in domain_scores:
-            domain_scores[q_domain] = {'correct': 0, 'total': 0}
-        domain_scores[q_domain]['total'] += 1
-        if answer['is_correct']:
-            domain_scores[q_domain]['correct'] += 1
+    domain_scores = get_domain_scores(session.get('quiz_id'))
+
+    # Progress may have been cleared mid-quiz; the session still has the answers
+    if sum(scores['total'] for scores in domain_scores.values()) < len(answers):
+        domain_scores = _domain_scores_from_answers(answers)
 
     return render_template('results.html',
                          score=score,
@@ -408,18 +683,19 @@ def results():
                          percentage=percentage,
                          passed=passed,
                          domain_scores=domain_scores,
-                         answers=answers,
-                         questions=questions)
+                         answers=answers)
 
 
 @app.route('/review')
 def review():
     """Review all answers"""
-    questions = session.get('questions', [])
     answers = session.get('answers', [])
 
     review_data = []
-    for i, (question, answer) in enumerate(zip(questions, answers)):
+    for i, answer in enumerate(answers):
+        question = _get_question_by_id(answer['question_id'])
+        if question is None:
+            continue
         review_data.append({
             'number': i + 1,
             'question': question,
@@ -437,8 +713,9 @@ def quiz_missed():
     if not questions:
         return render_template('error.html', message="No missed questions to practice! Great job!")
 
-    # Store questions in session
-    session['questions'] = questions
+    # Store only question ids in session, questions are re-fetched by id
+    session['qids'] = [q['id'] for q in questions]
+    session['quiz_id'] = uuid.uuid4().hex
     session['current_index'] = 0
     session['score'] = 0
     session['answers'] = []
@@ -461,7 +738,10 @@ def clear_progress_route():
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for statistics"""
-    return jsonify(get_stats())
+    # ETag lets pollers get a 304 while the stats haven't changed
+    response = jsonify(get_stats())
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 if __name__ == '__main__':
@@ -479,4 +759,5 @@ if __name__ == '__main__':
     print("\nPress Ctrl+C to stop the server")
     print("=" * 50)
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Debug mode is off unless FLASK_DEBUG is set (Flask reads it itself)
+    app.run(host='0.0.0.0', port=5000)